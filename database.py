@@ -70,14 +70,27 @@ class Database:
 
         return is_holiday, is_vacation, special_name
 
-    def store_data(self, visitor_count, weather_data=None):
-        """Store visitor count and weather data with timestamp on exact 15 min interval"""
+    def current_slot(self, now=None):
+        """Return the given (or current) time in Norway rounded to its 15-minute slot"""
+        if now is None:
+            now = datetime.datetime.now(pytz.timezone("Europe/Oslo"))
+        return self._round_to_15min_interval(now)
+
+    def store_data(self, visitor_count, weather_data=None, slot_time=None):
+        """Store visitor count and weather data with timestamp on exact 15 min interval
+
+        If slot_time is given, the row is stored for that slot instead of the
+        current one (used when filling slots from the retry queue).
+        """
         # Use local timezone (Norway)
         norway_tz = pytz.timezone("Europe/Oslo")
         now = datetime.datetime.now(norway_tz)
 
         # Round to nearest 15-minute interval
-        rounded_time = self._round_to_15min_interval(now)
+        if slot_time is None:
+            rounded_time = self._round_to_15min_interval(now)
+        else:
+            rounded_time = self._round_to_15min_interval(slot_time)
         timestamp = rounded_time.strftime("%Y-%m-%d %H:%M:%S")
 
         # Check if the date is a holiday or vacation period in Norway
@@ -146,8 +159,26 @@ class Database:
             "is_holiday": is_holiday,
             "is_vacation_period": is_vacation,
             "special_date_name": special_name,
+            "stored": should_append,
         }
 
+    def log_backfill(self, timestamp, sample_time, visitor_count):
+        """Record that a slot was filled with a sample taken at a later time"""
+        backfill_path = os.path.join(self.data_dir, "backfilled_slots.csv")
+        is_new = not os.path.exists(backfill_path)
+
+        with open(backfill_path, "a", newline="\n") as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(["timestamp", "sampled_at", "visitor_count"])
+            writer.writerow(
+                [
+                    timestamp,
+                    sample_time.strftime("%Y-%m-%d %H:%M:%S"),
+                    visitor_count,
+                ]
+            )
+
     # Keep the old method for backward compatibility
     def store_visitor_count(self, count, weather_data=None):
         """Store a visitor count with timestamp on exact 15 min interval"""
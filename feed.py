@@ -0,0 +1,126 @@
+import os
+import io
+import csv
+import gzip
+import json
+import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class ChangeFeed:
+    """
+    Publishes an append-only change feed next to the visitor CSV.
+
+    Every data row gets a cursor equal to its 1-based position in the CSV.
+    Because the CSV is only ever appended to, the cursor is monotonically
+    increasing and a client that knows its last cursor can ask for "everything
+    after N" without re-reading the history.
+
+    Two sidecar files are written to ``<data_dir>/feed/``:
+
+    - ``head.json``: the latest cursor, the first cursor covered by the
+      window, and the most recent rows inline. Polling clients that are at
+      most a few rows behind never need more than this file.
+    - ``window.csv.gz``: the rows from the last ``window_days`` days, each
+      prefixed with its cursor.
+    """
+
+    def __init__(
+        self,
+        data_dir="data",
+        csv_file="visitor_counts.csv",
+        feed_dir="feed",
+        window_days=7,
+        head_rows=8,
+    ):
+        self.csv_path = os.path.join(data_dir, csv_file)
+        self.feed_dir = os.path.join(data_dir, feed_dir)
+        self.head_path = os.path.join(self.feed_dir, "head.json")
+        self.window_path = os.path.join(self.feed_dir, "window.csv.gz")
+        self.window_days = window_days
+        self.head_rows = head_rows
+
+    def _read_rows(self):
+        """Read the CSV header and all data rows"""
+        with open(self.csv_path, "r", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            rows = [row for row in reader if row]
+        return header, rows
+
+    def _window_start(self, rows):
+        """Return the index of the first row inside the time window"""
+        if not rows:
+            return 0
+
+        latest = datetime.datetime.strptime(rows[-1][0], TIMESTAMP_FORMAT)
+        cutoff = latest - datetime.timedelta(days=self.window_days)
+
+        start = len(rows)
+        while start > 0:
+            timestamp = datetime.datetime.strptime(
+                rows[start - 1][0], TIMESTAMP_FORMAT
+            )
+            if timestamp < cutoff:
+                break
+            start -= 1
+        return start
+
+    def _write_atomic(self, path, data):
+        """Write bytes to a temporary file and move it into place"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def publish(self):
+        """Regenerate the head and window sidecar files from the CSV"""
+        if not os.path.exists(self.csv_path):
+            logger.warning(f"No CSV at {self.csv_path}, skipping feed publish")
+            return None
+
+        os.makedirs(self.feed_dir, exist_ok=True)
+
+        header, rows = self._read_rows()
+        cursor = len(rows)
+        start = self._window_start(rows)
+
+        # Window rows are prefixed with their cursor so clients can filter
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(["cursor"] + header)
+        for index in range(start, len(rows)):
+            writer.writerow([index + 1] + rows[index])
+        window_text = buffer.getvalue()
+
+        # mtime=0 keeps the gzip output stable for identical content
+        window_bytes = gzip.compress(window_text.encode("utf-8"), mtime=0)
+        self._write_atomic(self.window_path, window_bytes)
+
+        head_start = max(start, len(rows) - self.head_rows)
+        head = {
+            "cursor": cursor,
+            "window_start_cursor": start + 1,
+            "window_days": self.window_days,
+            "columns": header,
+            "latest_timestamp": rows[-1][0] if rows else None,
+            "recent": [
+                {"cursor": index + 1, "row": rows[index]}
+                for index in range(head_start, len(rows))
+            ],
+        }
+        head_bytes = (json.dumps(head, ensure_ascii=False, indent=2) + "\n").encode(
+            "utf-8"
+        )
+        self._write_atomic(self.head_path, head_bytes)
+
+        print(
+            f"Feed published: cursor {cursor}, "
+            f"{len(rows) - start} rows in {self.window_days}-day window"
+        )
+        return head
+
@@ -0,0 +1,145 @@
+import os
+import io
+import csv
+import gzip
+import logging
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = (
+    "https://raw.githubusercontent.com/MetisPrometheus/datacollector-trimmeriet/main/data"
+)
+
+
+class FeedClient:
+    """
+    Keeps a local CSV replica of the visitor data in sync with the change feed.
+
+    The replica's cursor is its number of data rows. Each sync fetches the
+    small ``feed/head.json`` first and only falls back to the gzipped window,
+    or as a last resort the full CSV, when the replica is further behind than
+    the head covers.
+    """
+
+    def __init__(
+        self,
+        replica_path="visitor_counts_replica.csv",
+        base_url=DEFAULT_BASE_URL,
+        csv_file="visitor_counts.csv",
+        feed_dir="feed",
+        timeout=30,
+    ):
+        self.replica_path = replica_path
+        self.base_url = base_url.rstrip("/")
+        self.csv_url = f"{self.base_url}/{csv_file}"
+        self.head_url = f"{self.base_url}/{feed_dir}/head.json"
+        self.window_url = f"{self.base_url}/{feed_dir}/window.csv.gz"
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _get(self, url):
+        """Fetch a URL and return the response, raising on HTTP errors"""
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def local_cursor(self):
+        """Return the cursor of the last row in the local replica"""
+        if not os.path.exists(self.replica_path):
+            return 0
+
+        with open(self.replica_path, "r", newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)  # Skip header
+            return sum(1 for row in reader if row)
+
+    def _append_rows(self, header, rows):
+        """Append rows to the replica, writing the header for a new file"""
+        is_new = not os.path.exists(self.replica_path)
+        with open(self.replica_path, "a", newline="\n") as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(header)
+            writer.writerows(rows)
+
+    def _rows_from_window(self, local, remote):
+        """
+        Download the gzipped window and return rows after the local cursor.
+
+        The head and window are cached separately, so the window may be newer
+        than the head. Rows past the head's cursor are left for the next sync.
+        If the window no longer reaches back to the row after the local
+        cursor, None is returned because appending would leave a gap.
+        """
+        text = gzip.decompress(self._get(self.window_url).content).decode("utf-8")
+        reader = csv.reader(io.StringIO(text))
+        next(reader, None)  # Skip header
+
+        cursors = []
+        rows = []
+        for row in reader:
+            if row and local < int(row[0]) <= remote:
+                cursors.append(int(row[0]))
+                rows.append(row[1:])
+
+        if cursors != list(range(local + 1, local + 1 + len(cursors))):
+            return None
+        return rows
+
+    def _full_resync(self):
+        """Replace the replica with a fresh copy of the full CSV"""
+        text = self._get(self.csv_url).content.decode("utf-8")
+        reader = csv.reader(io.StringIO(text))
+        header = next(reader, [])
+        rows = [row for row in reader if row]
+
+        if os.path.exists(self.replica_path):
+            os.remove(self.replica_path)
+        self._append_rows(header, rows)
+        return len(rows)
+
+    def sync(self):
+        """
+        Bring the local replica up to date.
+
+        Returns:
+            int: Number of rows added to the replica
+        """
+        local = self.local_cursor()
+        head = self._get(self.head_url).json()
+        remote = head["cursor"]
+
+        if remote == local:
+            return 0
+
+        if remote < local:
+            # The remote history was rewritten, so start over
+            logger.warning(
+                f"Replica cursor {local} is ahead of feed cursor {remote}, resyncing"
+            )
+            return self._full_resync()
+
+        recent = head.get("recent", [])
+        if recent and recent[0]["cursor"] <= local + 1:
+            rows = [
+                item["row"] for item in recent if local < item["cursor"] <= remote
+            ]
+        elif head["window_start_cursor"] <= local + 1:
+            rows = self._rows_from_window(local, remote)
+            if rows is None:
+                logger.info(f"Window does not continue from cursor {local}, resyncing")
+                return self._full_resync()
+        else:
+            logger.info(f"Replica cursor {local} is outside the window, resyncing")
+            return self._full_resync()
+
+        self._append_rows(head["columns"], rows)
+        logger.info(f"Synced {len(rows)} new rows, cursor now {local + len(rows)}")
+        return len(rows)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    added = FeedClient().sync()
+    print(f"Added {added} rows")
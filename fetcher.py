@@ -0,0 +1,365 @@
+import os
+import json
+import time
+import random
+import datetime
+import logging
+import threading
+import concurrent.futures
+import pytz
+import requests
+from scraper import XAKT_URL, HEADERS, parse_visitor_count
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class LatencyHistogram:
+    """
+    Bucketed per-attempt latency histogram, persisted between runs.
+
+    Each GitHub Actions run is a fresh process, so the histogram is stored as
+    JSON next to the data to let the p95 used for hedging build up over time.
+
+    Attempts are recorded as ``success``, ``error`` or ``timeout``. A timed
+    out attempt was at least as slow as its recorded latency, so timeouts
+    count towards the tail used for the hedge delay.
+    """
+
+    OUTCOMES = ["success", "error", "timeout"]
+
+    # Upper bounds in seconds; the last bucket catches everything slower
+    BUCKETS = [0.25, 0.5, 1, 2, 4, 8, 16, 32]
+
+    def __init__(self, path=None):
+        self.path = path
+        self.counts = {
+            outcome: [0] * (len(self.BUCKETS) + 1) for outcome in self.OUTCOMES
+        }
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Load saved counts if the file exists and matches the bucket layout"""
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if data.get("buckets") == self.BUCKETS:
+                for outcome, counts in data["counts"].items():
+                    if outcome in self.counts:
+                        self.counts[outcome] = counts
+        except (ValueError, KeyError, IOError) as e:
+            logger.warning(f"Ignoring unreadable latency histogram: {e}")
+
+    def save(self):
+        """Write the histogram to disk"""
+        if not self.path:
+            return
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock:
+            data = {"buckets": self.BUCKETS, "counts": self.counts}
+        with open(self.path, "w") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+
+    def record(self, seconds, outcome="success"):
+        """Add one attempt's latency to the matching bucket"""
+        index = len(self.BUCKETS)
+        for i, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                index = i
+                break
+
+        with self._lock:
+            self.counts[outcome][index] += 1
+
+    def percentile(self, q):
+        """
+        Return the bucket upper bound containing the q-th percentile of
+        successful and timed out attempts, or None if there are no samples yet
+        """
+        with self._lock:
+            counts = [
+                success + timeout
+                for success, timeout in zip(
+                    self.counts["success"], self.counts["timeout"]
+                )
+            ]
+
+        total = sum(counts)
+        if total == 0:
+            return None
+
+        running = 0
+        for i, count in enumerate(counts):
+            running += count
+            if running >= q * total:
+                return self.BUCKETS[min(i, len(self.BUCKETS) - 1)]
+        return None
+
+
+class RetryQueue:
+    """
+    Persisted queue of 15-minute slots whose fetch failed.
+
+    A later tick can fill a slot with its own sample as long as that sample is
+    taken within ``validity`` of the slot time; older slots are dropped. The
+    default leaves room for the next scheduled tick to start a few minutes
+    late, as GitHub Actions cron runs often do.
+    """
+
+    def __init__(
+        self, path="data/retry_queue.json", validity=datetime.timedelta(minutes=20)
+    ):
+        self.path = path
+        self.validity = validity
+        self.tz = pytz.timezone("Europe/Oslo")
+        self.slots = self._load()
+
+    def _load(self):
+        """Load pending slot timestamps from disk"""
+        if not os.path.exists(self.path):
+            return []
+
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f).get("pending", [])
+        except (ValueError, IOError) as e:
+            logger.warning(f"Ignoring unreadable retry queue: {e}")
+            return []
+
+    def save(self):
+        """Write pending slots to disk"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump({"pending": self.slots}, f, indent=2)
+            f.write("\n")
+
+    def add(self, slot_time):
+        """Queue a slot for a later tick"""
+        timestamp = slot_time.strftime(TIMESTAMP_FORMAT)
+        if timestamp not in self.slots:
+            self.slots.append(timestamp)
+            print(f"Queued slot {timestamp} for retry")
+
+    def remove(self, slot_time):
+        """Remove a slot once it has been filled"""
+        timestamp = slot_time.strftime(TIMESTAMP_FORMAT)
+        if timestamp in self.slots:
+            self.slots.remove(timestamp)
+
+    def pending(self, now):
+        """
+        Return the slots that can still be filled at ``now``, oldest first.
+
+        Expired slots are dropped from the queue. Valid slots stay queued
+        until the caller ``remove``s them.
+        """
+        valid = []
+        for timestamp in sorted(self.slots):
+            slot_time = self.tz.localize(
+                datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+            )
+            if now - slot_time <= self.validity:
+                valid.append(slot_time)
+            else:
+                print(f"Dropping expired retry slot {timestamp}")
+                self.slots.remove(timestamp)
+
+        return valid
+
+
+class DeadlineFetcher:
+    """
+    Fetches the visitor count within a fixed latency budget.
+
+    Failed attempts are retried with capped exponential backoff and full
+    jitter. With hedging enabled, a second request is started if the first
+    has not answered after the p95 latency from the histogram (capped at half
+    the attempt timeout), and whichever finishes first wins. No attempt is allowed to run past the deadline.
+
+    Call ``close`` before saving the histogram so that attempts still running
+    after ``fetch`` returns (such as the request a hedge beat) are recorded.
+    """
+
+    def __init__(
+        self,
+        url=XAKT_URL,
+        budget=60,
+        attempt_timeout=20,
+        max_retries=3,
+        backoff_base=1,
+        backoff_cap=8,
+        hedge=True,
+        default_hedge_delay=5,
+        min_hedge_delay=0.5,
+        histogram=None,
+    ):
+        self.url = url
+        self.budget = budget
+        self.attempt_timeout = attempt_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hedge = hedge
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.histogram = histogram if histogram is not None else LatencyHistogram()
+        self._deadline = None
+        self._futures = []
+        self._running = {}
+        self._lock = threading.Lock()
+
+    def _finish(self, attempt_id, outcome):
+        """Record an attempt's latency unless close() already gave up on it"""
+        with self._lock:
+            start = self._running.pop(attempt_id, None)
+        if start is not None:
+            self.histogram.record(time.monotonic() - start, outcome)
+
+    def _read_body(self, response, attempt_deadline):
+        """Read the response body, giving up once the deadline has passed"""
+        # requests' timeout only bounds each connect or read, so the body is
+        # read as it arrives and the deadline checked between chunks
+        read1 = getattr(response.raw, "read1", None)
+        if read1 is not None:
+            chunks = iter(lambda: read1(65536, decode_content=True), b"")
+        else:
+            chunks = response.iter_content(chunk_size=1024)
+
+        body = b""
+        for chunk in chunks:
+            if time.monotonic() > attempt_deadline:
+                raise TimeoutError("Response not received before the deadline")
+            body += chunk
+        return body.decode(response.encoding or "utf-8", errors="replace")
+
+    def _attempt(self, attempt_deadline):
+        """Make a single request and return the parsed count, recording latency"""
+        attempt_id = object()
+        with self._lock:
+            self._running[attempt_id] = time.monotonic()
+
+        try:
+            with requests.get(
+                self.url,
+                headers=HEADERS,
+                timeout=attempt_deadline - time.monotonic(),
+                stream=True,
+            ) as response:
+                response.raise_for_status()
+                html = self._read_body(response, attempt_deadline)
+
+            visitor_count = parse_visitor_count(html)
+            if visitor_count is None:
+                raise ValueError("Visitor count element not found on page")
+        except (TimeoutError, requests.exceptions.Timeout):
+            self._finish(attempt_id, "timeout")
+            raise
+        except Exception:
+            self._finish(attempt_id, "error")
+            raise
+
+        self._finish(attempt_id, "success")
+        return visitor_count
+
+    def _hedge_delay(self):
+        """Return how long to wait before sending a hedged request"""
+        p95 = self.histogram.percentile(0.95)
+        if p95 is None:
+            p95 = self.default_hedge_delay
+
+        # Timeouts push the p95 towards the slowest bucket. Capping the delay
+        # keeps hedging working while the server is slow, which is when it
+        # matters most.
+        return min(max(self.min_hedge_delay, p95), self.attempt_timeout / 2)
+
+    def _hedged_attempt(self, deadline):
+        """Run one attempt, adding a hedged request if the first one is slow"""
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        futures = []
+        try:
+            attempt_deadline = min(time.monotonic() + self.attempt_timeout, deadline)
+            futures = [executor.submit(self._attempt, attempt_deadline)]
+            delay = self._hedge_delay()
+
+            if self.hedge and delay < deadline - time.monotonic():
+                done, _ = concurrent.futures.wait(futures, timeout=delay)
+                if not done:
+                    hedge_deadline = min(
+                        time.monotonic() + self.attempt_timeout, deadline
+                    )
+                    print(f"No response after {delay:.2f}s, sending hedged request")
+                    futures.append(executor.submit(self._attempt, hedge_deadline))
+
+            # Return the first success, or raise the last error if all fail
+            error = None
+            remaining = max(0, deadline - time.monotonic())
+            try:
+                for future in concurrent.futures.as_completed(
+                    futures, timeout=remaining
+                ):
+                    try:
+                        return future.result()
+                    except Exception as e:
+                        error = e
+            except concurrent.futures.TimeoutError:
+                raise TimeoutError("No response before the deadline")
+            raise error
+        finally:
+            self._futures.extend(futures)
+            executor.shutdown(wait=False)
+
+    def close(self):
+        """
+        Wait for attempts that are still running so their latency is recorded.
+
+        Waits no longer than the deadline of the last fetch. Attempts still
+        running after that are recorded as timeouts and then ignored.
+        """
+        if self._futures and self._deadline is not None:
+            remaining = max(0, self._deadline - time.monotonic())
+            concurrent.futures.wait(self._futures, timeout=remaining)
+
+        with self._lock:
+            abandoned = list(self._running.values())
+            self._running = {}
+        for start in abandoned:
+            self.histogram.record(time.monotonic() - start, "timeout")
+        self._futures = []
+
+    def fetch(self):
+        """
+        Fetch the visitor count, retrying until the budget runs out.
+
+        Returns:
+            int: Visitor count, or None if every attempt failed
+        """
+        deadline = time.monotonic() + self.budget
+        self._deadline = deadline
+
+        for attempt in range(self.max_retries + 1):
+            if deadline - time.monotonic() <= 0:
+                break
+
+            try:
+                return self._hedged_attempt(deadline)
+            except Exception as e:
+                print(f"Attempt {attempt + 1} failed: {e}")
+
+            if attempt == self.max_retries:
+                break
+
+            backoff = min(self.backoff_cap, self.backoff_base * 2**attempt)
+            sleep_for = random.uniform(0, backoff)
+            if time.monotonic() + sleep_for >= deadline:
+                break
+            time.sleep(sleep_for)
+
+        print("Failed to fetch visitor count within the latency budget")
+        return None
@@ -0,0 +1,215 @@
+import datetime
+import logging
+from pathlib import Path
+import pandas as pd
+
+
+class OpeningHours:
+    """
+    Opening hours learned from visitor history.
+
+    A (weekday, hour) slot counts as open if at least ``open_ratio`` of its
+    samples had visitors. In ``data/visitor_counts.csv`` the share of
+    non-zero samples is 5-12% at 02-04h and 24-60% at every other hour,
+    so 0.2 separates the night hours from the rest. Slots with fewer than
+    ``min_samples`` samples are treated as open so the sampler never backs
+    off on hours it knows little about.
+
+    At most one sample per ``sample_spacing`` seconds is kept, matching the
+    15-minute history. Otherwise minute-level data and fast live polling
+    would outweigh it.
+    """
+
+    def __init__(self, open_ratio=0.2, min_samples=30, sample_spacing=900):
+        self.open_ratio = open_ratio
+        self.min_samples = min_samples
+        self.sample_spacing = datetime.timedelta(seconds=sample_spacing)
+        self.samples = {}
+        self.nonzero = {}
+        self.last_added = None
+
+    def learn_from_csv(self, csv_file):
+        """Add every sample in a timestamp/visitor_count CSV to the history"""
+        if not Path(csv_file).exists():
+            return
+
+        try:
+            df = pd.read_csv(csv_file, usecols=["timestamp", "visitor_count"])
+        except Exception as e:
+            logging.warning(f"Could not read history from {csv_file}: {e}")
+            return
+
+        df = df.dropna()
+        timestamps = pd.to_datetime(df["timestamp"], errors="coerce")
+        for timestamp, count in zip(timestamps, df["visitor_count"]):
+            if not pd.isna(timestamp):
+                self.add(timestamp.to_pydatetime(), count)
+
+        logging.info(f"Learned opening hours from {len(df)} samples in {csv_file}")
+
+    def add(self, timestamp, count):
+        """Record one sample, skipping it if the previous one was too recent"""
+        if (
+            self.last_added is not None
+            and abs(timestamp - self.last_added) < self.sample_spacing
+        ):
+            return
+        self.last_added = timestamp
+
+        key = (timestamp.weekday(), timestamp.hour)
+        self.samples[key] = self.samples.get(key, 0) + 1
+        if count > 0:
+            self.nonzero[key] = self.nonzero.get(key, 0) + 1
+
+    def is_open(self, timestamp):
+        """Return whether the gym is usually open at the given time"""
+        key = (timestamp.weekday(), timestamp.hour)
+        samples = self.samples.get(key, 0)
+        if samples < self.min_samples:
+            return True
+        return self.nonzero.get(key, 0) / samples >= self.open_ratio
+
+
+class AdaptiveSampler:
+    """
+    Chooses the delay until the next poll from recent visitor counts.
+
+    The interval drops to ``min_interval`` whenever the count changes and
+    doubles (up to ``max_interval``) while it stays flat. For ``active_window``
+    seconds after a change it stays at or below ``active_interval``, so busy
+    periods are sampled faster than once a minute throughout. Outside learned
+    opening hours with nobody inside it jumps straight to ``max_interval``.
+
+    Requests are paid for from a token bucket that refills at ``budget``
+    requests per day and holds up to ``burst`` tokens. The bucket is large
+    enough to bank the polls saved while the gym is quiet and spend them on
+    busy periods, so busy hours can poll well above once a minute while the
+    daily total averages at most ``budget``.
+    """
+
+    def __init__(
+        self,
+        min_interval=10,
+        max_interval=300,
+        active_interval=40,
+        active_window=180,
+        budget=1200,
+        burst=400,
+        backoff_factor=2,
+        opening_hours=None,
+    ):
+        if budget <= 0:
+            raise ValueError("budget must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.active_interval = active_interval
+        self.active_window = datetime.timedelta(seconds=active_window)
+        self.budget = budget
+        self.burst = burst
+        self.backoff_factor = backoff_factor
+        self.opening_hours = opening_hours if opening_hours else OpeningHours()
+        self.interval = min_interval
+        self.last_count = None
+        self.last_change = None
+        self.tokens = burst
+        self.last_refill = None
+
+    def _spend_token(self, now):
+        """Pay for a request and return the seconds until the next token is available"""
+        rate = self.budget / 86400
+        if self.last_refill is not None:
+            elapsed = (now - self.last_refill).total_seconds()
+            self.tokens = min(self.burst, self.tokens + elapsed * rate)
+        self.last_refill = now
+
+        self.tokens -= 1
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / rate
+
+    def next_interval(self, now, count):
+        """
+        Record a poll made at ``now`` and return seconds until the next one.
+
+        Args:
+            now (datetime): When the poll was made
+            count (int): Visitor count from the poll, or None if it failed
+        """
+        budget_delay = self._spend_token(now)
+
+        if count is not None:
+            self.opening_hours.add(now, count)
+
+            if self.last_count is None or count != self.last_count:
+                self.interval = self.min_interval
+                self.last_change = now
+            else:
+                self.interval = min(
+                    self.max_interval, self.interval * self.backoff_factor
+                )
+                if now - self.last_change <= self.active_window:
+                    self.interval = min(self.interval, self.active_interval)
+
+            if count == 0 and not self.opening_hours.is_open(now):
+                self.interval = self.max_interval
+
+            self.last_count = count
+
+        return max(self.interval, budget_delay)
+
+
+class Resampler:
+    """
+    Converts irregular samples to a fixed interval on the fly.
+
+    The visitor count is a level that holds until the next sample, so each
+    grid point gets the most recent count observed at or before it. A count
+    is held for at most ``max_hold`` seconds; grid points in longer gaps,
+    such as network outages, are left out.
+    """
+
+    def __init__(self, interval=60, max_hold=600):
+        self.interval = datetime.timedelta(seconds=interval)
+        self.max_hold = datetime.timedelta(seconds=max_hold)
+        self.next_point = None
+        self.last_count = None
+        self.last_time = None
+
+    def _align(self, timestamp):
+        """Return the first grid point at or after the timestamp"""
+        midnight = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+        steps = -(-(timestamp - midnight) // self.interval)
+        return midnight + steps * self.interval
+
+    def add(self, timestamp, count):
+        """
+        Add a sample and return the grid points it completes.
+
+        Returns:
+            list: (timestamp, count) tuples for every grid point before the
+            sample within ``max_hold`` of the previous one, filled with the
+            previous count
+        """
+        points = []
+        if self.next_point is None:
+            self.next_point = self._align(timestamp)
+
+        while self.last_count is not None and self.next_point < timestamp:
+            if self.next_point - self.last_time > self.max_hold:
+                # Too long since the last sample to carry it forward
+                self.next_point = self._align(timestamp)
+                break
+            points.append((self.next_point, self.last_count))
+            self.next_point += self.interval
+
+        # A sample exactly on a grid point defines that point
+        if self.next_point == timestamp:
+            points.append((self.next_point, count))
+            self.next_point += self.interval
+
+        self.last_count = count
+        self.last_time = timestamp
+        return points
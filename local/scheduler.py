@@ -7,6 +7,8 @@ import pandas as pd
 import os
 from pathlib import Path
 import psutil
+import argparse
+from adaptive import AdaptiveSampler, OpeningHours, Resampler
 
 # Set up logging
 logging.basicConfig(
@@ -17,6 +19,12 @@ logging.basicConfig(
 
 # CSV file setup
 CSV_FILE = "visitor_counts.csv"
+ADAPTIVE_CSV_FILE = "visitor_counts_adaptive.csv"
+RESAMPLED_CSV_FILE = "visitor_counts_resampled.csv"
+# The 15-minute history collected by main.py, used to learn opening hours
+HISTORY_CSV_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "data", "visitor_counts.csv"
+)
 CSV_COLUMNS = ["timestamp", "visitor_count"]
 
 
@@ -28,7 +36,7 @@ def fetch_visitor_count():
     }
 
     try:
-        response = requests.get(url, headers=headers)
+        response = requests.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         soup = BeautifulSoup(response.text, "html.parser")
 
@@ -43,14 +51,14 @@ def fetch_visitor_count():
         return None
 
 
-def initialize_csv():
+def initialize_csv(csv_file=CSV_FILE):
     """Create the CSV file with headers if it doesn't exist"""
-    if not Path(CSV_FILE).exists():
-        pd.DataFrame(columns=CSV_COLUMNS).to_csv(CSV_FILE, index=False)
-        logging.info(f"Created new CSV file: {CSV_FILE}")
+    if not Path(csv_file).exists():
+        pd.DataFrame(columns=CSV_COLUMNS).to_csv(csv_file, index=False)
+        logging.info(f"Created new CSV file: {csv_file}")
 
 
-def save_to_dataframe(timestamp, visitor_count):
+def save_to_dataframe(timestamp, visitor_count, csv_file=CSV_FILE):
     """Save the data to a pandas DataFrame and then to CSV"""
     # Create a new row as a DataFrame
     new_data = pd.DataFrame(
@@ -58,23 +66,23 @@ def save_to_dataframe(timestamp, visitor_count):
     )
 
     # If the file exists, append to it
-    if os.path.exists(CSV_FILE):
+    if os.path.exists(csv_file):
         # Read existing data
         try:
-            df = pd.read_csv(CSV_FILE)
+            df = pd.read_csv(csv_file)
             # Append new data
             df = pd.concat([df, new_data], ignore_index=True)
             # Save back to CSV
-            df.to_csv(CSV_FILE, index=False)
+            df.to_csv(csv_file, index=False)
         except Exception as e:
             logging.error(f"Error appending to CSV: {e}")
             # Fallback to direct append
-            new_data.to_csv(CSV_FILE, mode="a", header=False, index=False)
+            new_data.to_csv(csv_file, mode="a", header=False, index=False)
     else:
         # Create new file with header
-        new_data.to_csv(CSV_FILE, index=False)
+        new_data.to_csv(csv_file, index=False)
 
-    logging.info(f"Saved data to {CSV_FILE}")
+    logging.info(f"Saved data to {csv_file}")
 
 
 def job():
@@ -90,6 +98,33 @@ def job():
         logging.warning("Failed to retrieve visitor count")
 
 
+def run_adaptive(sampler, resampler):
+    """Poll at an adaptive rate, saving irregular samples and a fixed-interval copy"""
+    while True:
+        visitor_count = fetch_visitor_count()
+
+        # Timestamp the sample when the response arrived, to the second
+        now = datetime.datetime.now().replace(microsecond=0)
+        timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
+
+        if visitor_count is not None:
+            logging.info(f"Current visitor count: {visitor_count}")
+            save_to_dataframe(timestamp, visitor_count, ADAPTIVE_CSV_FILE)
+
+            for point_time, point_count in resampler.add(now, visitor_count):
+                save_to_dataframe(
+                    point_time.strftime("%Y-%m-%d %H:%M:%S"),
+                    point_count,
+                    RESAMPLED_CSV_FILE,
+                )
+        else:
+            logging.warning("Failed to retrieve visitor count")
+
+        interval = sampler.next_interval(now, visitor_count)
+        logging.info(f"Next poll in {interval:.0f} seconds")
+        time.sleep(interval)
+
+
 def wait_until_next_minute():
     """Wait until the start of the next minute"""
     now = datetime.datetime.now()
@@ -159,13 +194,62 @@ def remove_lock_file():
             logging.error(f"Failed to remove lock file: {e}")
 
 
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Local visitor count scheduler")
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="poll faster while the count changes and back off while it is flat",
+    )
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=10,
+        help="shortest delay between polls in adaptive mode (seconds)",
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=300,
+        help="longest delay between polls in adaptive mode (seconds)",
+    )
+    parser.add_argument(
+        "--budget",
+        type=int,
+        default=1200,
+        help="number of requests per day allowed in adaptive mode",
+    )
+    parser.add_argument(
+        "--burst",
+        type=int,
+        default=400,
+        help="requests that can be saved up during quiet hours in adaptive mode",
+    )
+    parser.add_argument(
+        "--resample-interval",
+        type=int,
+        default=60,
+        help="interval of the resampled output in adaptive mode (seconds)",
+    )
+    args = parser.parse_args()
+
+    if args.budget <= 0:
+        parser.error("--budget must be positive")
+    if args.burst < 1:
+        parser.error("--burst must be at least 1")
+    return args
+
+
 if __name__ == "__main__":
+    args = parse_args()
+
     # Check if another instance is running
     if not create_lock_file():
         exit(1)
 
     # Initialize the CSV file if it doesn't exist
-    initialize_csv()
+    initialize_csv(ADAPTIVE_CSV_FILE if args.adaptive else CSV_FILE)
 
     # Track the last execution time to prevent duplicate runs
     last_execution_minute = -1
@@ -173,26 +257,46 @@ if __name__ == "__main__":
     logging.info("Visitor count tracking started. Press Ctrl+C to exit.")
 
     try:
-        # Run continuously, on every minute
-        while True:
-            # Wait until the start of the next minute
-            wait_until_next_minute()
-
-            # Get current minute and check if we already ran in this minute
-            current_minute = datetime.datetime.now().minute
-
-            if current_minute != last_execution_minute:
-                # Run the job
-                job()
-                # Update the last execution minute
-                last_execution_minute = current_minute
-            else:
-                logging.warning(
-                    f"Skipping execution - already ran in minute {current_minute}"
-                )
-
-            # Small delay to prevent tight loop
-            time.sleep(1)
+        if args.adaptive:
+            # Learn opening hours from everything collected so far
+            opening_hours = OpeningHours()
+            opening_hours.learn_from_csv(HISTORY_CSV_FILE)
+            opening_hours.learn_from_csv(CSV_FILE)
+            opening_hours.learn_from_csv(ADAPTIVE_CSV_FILE)
+
+            sampler = AdaptiveSampler(
+                min_interval=args.min_interval,
+                max_interval=args.max_interval,
+                budget=args.budget,
+                burst=args.burst,
+                opening_hours=opening_hours,
+            )
+            # Don't carry a count across gaps much longer than a normal poll
+            resampler = Resampler(
+                args.resample_interval, max_hold=2 * args.max_interval
+            )
+            run_adaptive(sampler, resampler)
+        else:
+            # Run continuously, on every minute
+            while True:
+                # Wait until the start of the next minute
+                wait_until_next_minute()
+
+                # Get current minute and check if we already ran in this minute
+                current_minute = datetime.datetime.now().minute
+
+                if current_minute != last_execution_minute:
+                    # Run the job
+                    job()
+                    # Update the last execution minute
+                    last_execution_minute = current_minute
+                else:
+                    logging.warning(
+                        f"Skipping execution - already ran in minute {current_minute}"
+                    )
+
+                # Small delay to prevent tight loop
+                time.sleep(1)
     except KeyboardInterrupt:
         logging.info("Scheduler stopped by user")
     except Exception as e:
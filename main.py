@@ -1,17 +1,33 @@
-from scraper import fetch_visitor_count
+import datetime
+import pytz
+from fetcher import DeadlineFetcher, LatencyHistogram, RetryQueue
 from weather import fetch_weather_data
 from weather_simplifier import get_simplified_weather_data
 from database import Database
+from feed import ChangeFeed
 
 
 def main():
     # Initialize database
     db = Database()
 
-    # Fetch visitor count
-    visitor_count = fetch_visitor_count()
+    # Failed slots from earlier ticks and per-attempt latencies persist in data/
+    retry_queue = RetryQueue()
+    histogram = LatencyHistogram("data/fetch_latency.json")
+
+    # Fetch visitor count within the per-tick latency budget
+    fetcher = DeadlineFetcher(histogram=histogram)
+    visitor_count = fetcher.fetch()
     print(f"Fetched visitor count: {visitor_count}")
 
+    # The slot this tick is for, taken after fetching so it matches the sample
+    sample_time = datetime.datetime.now(pytz.timezone("Europe/Oslo"))
+    slot_time = db.current_slot(sample_time)
+
+    # Let requests beaten by a hedge finish so their latency is saved too
+    fetcher.close()
+    histogram.save()
+
     # Fetch weather data - Use coordinates for Sandnes, Norway
     weather_data = fetch_weather_data(latitude=58.8534, longitude=5.7317)
 
@@ -27,10 +43,27 @@ def main():
     print(f"  Is daytime: {weather_data.get('is_daytime')}")
 
     if visitor_count is not None:
+        # Fill earlier failed slots that are still valid with this sample.
+        # The rows are logged in backfilled_slots.csv so they can be told
+        # apart from samples taken on time.
+        for pending_slot in retry_queue.pending(sample_time):
+            if pending_slot < slot_time:
+                print(f"Filling retry slot {pending_slot.strftime('%H:%M')}")
+                filled = db.store_data(
+                    visitor_count, weather_data, slot_time=pending_slot
+                )
+                if filled["stored"]:
+                    db.log_backfill(filled["timestamp"], sample_time, visitor_count)
+                retry_queue.remove(pending_slot)
+
         # Store visitor count and weather data
-        result = db.store_data(visitor_count, weather_data)
+        result = db.store_data(visitor_count, weather_data, slot_time=slot_time)
+        retry_queue.remove(slot_time)
         print(f"Data storage complete.")
 
+        # Refresh the incremental sync feed for downstream clients
+        ChangeFeed().publish()
+
         # Print special date information
         if result["is_holiday"] == "yes" or result["is_vacation_period"] == "yes":
             print(f"Special date detected: {result['special_date_name']}")
@@ -38,6 +71,9 @@ def main():
             print(f"  Is vacation period: {result['is_vacation_period']}")
     else:
         print("Failed to fetch visitor count")
+        retry_queue.add(slot_time)
+
+    retry_queue.save()
 
 
 if __name__ == "__main__":
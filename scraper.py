@@ -2,27 +2,33 @@ import requests
 from bs4 import BeautifulSoup
 
 
+XAKT_URL = "https://medlem.xakt.no/MinSide/Home/VisitorStatistics?org=818598912"
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+
+def parse_visitor_count(html):
+    """Extract the visitor count from a Xakt statistics page, or None if missing"""
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Extract the div with the visitor count
+    visitor_element = soup.select_one('div[style="font-size: 2rem;"]')
+    if visitor_element:
+        return int(visitor_element.text.strip())
+    return None
+
+
 def fetch_visitor_count():
     """Scrape the visitor count from the Xakt website"""
-    url = "https://medlem.xakt.no/MinSide/Home/VisitorStatistics?org=818598912"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-
     try:
-        response = requests.get(url, headers=headers, timeout=30)
+        response = requests.get(XAKT_URL, headers=HEADERS, timeout=30)
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Extract the div with the visitor count
-        visitor_element = soup.select_one('div[style="font-size: 2rem;"]')
-        if visitor_element:
-            visitor_count = int(visitor_element.text.strip())
-            return visitor_count
-        else:
+        visitor_count = parse_visitor_count(response.text)
+        if visitor_count is None:
             print("Visitor count element not found on page")
-            return None
+        return visitor_count
 
     except Exception as e:
         print(f"Error fetching visitor data: {e}")
@@ -0,0 +1,210 @@
+import datetime
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytz
+from fetcher import DeadlineFetcher, LatencyHistogram, RetryQueue
+
+PAGE = b'<html><body><div style="font-size: 2rem;"> 42 </div></body></html>'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves the Xakt page following the server's plan of responses"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        response = self.server.next_response()
+        time.sleep(response.get("delay", 0))
+
+        status = response.get("status", 200)
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        if status != 200:
+            return
+
+        # Drip the body one byte at a time to defeat per-read timeouts
+        drip = response.get("drip", 0)
+        try:
+            if drip:
+                for byte in PAGE:
+                    self.wfile.write(bytes([byte]))
+                    self.wfile.flush()
+                    time.sleep(drip)
+            else:
+                self.wfile.write(PAGE)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Local stand-in for Xakt that injects latency, errors and slow bodies"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.plan = []
+        self.default = {}
+        self.hits = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/"
+
+    def configure(self, plan=None, default=None):
+        """Set the responses for the next requests and the fallback after them"""
+        with self._lock:
+            self.plan = list(plan or [])
+            self.default = default or {}
+            self.hits = 0
+
+    def next_response(self):
+        with self._lock:
+            self.hits += 1
+            return self.plan.pop(0) if self.plan else self.default
+
+
+class DeadlineFetcherTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StandInServer()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def make_fetcher(self, **kwargs):
+        options = {"backoff_base": 0.05, "backoff_cap": 0.2}
+        options.update(kwargs)
+        return DeadlineFetcher(url=self.server.url, **options)
+
+    def test_retries_until_success(self):
+        self.server.configure(plan=[{"status": 500}, {"status": 503}])
+        fetcher = self.make_fetcher(hedge=False)
+
+        self.assertEqual(fetcher.fetch(), 42)
+        fetcher.close()
+
+        self.assertEqual(self.server.hits, 3)
+        self.assertEqual(sum(fetcher.histogram.counts["error"]), 2)
+        self.assertEqual(sum(fetcher.histogram.counts["success"]), 1)
+
+    def test_returns_none_when_every_attempt_fails(self):
+        self.server.configure(default={"status": 500})
+        fetcher = self.make_fetcher(max_retries=2, hedge=False)
+
+        self.assertIsNone(fetcher.fetch())
+        fetcher.close()
+
+        self.assertEqual(self.server.hits, 3)
+
+    def test_backoff_stops_at_budget(self):
+        self.server.configure(default={"status": 500})
+        fetcher = self.make_fetcher(
+            budget=1, max_retries=100, backoff_base=0.1, backoff_cap=0.4, hedge=False
+        )
+
+        start = time.monotonic()
+        self.assertIsNone(fetcher.fetch())
+        elapsed = time.monotonic() - start
+        fetcher.close()
+
+        self.assertLess(elapsed, 1.2)
+        self.assertLess(self.server.hits, 101)
+
+    def test_slow_drip_body_is_cut_off_at_deadline(self):
+        self.server.configure(default={"drip": 0.2})
+        fetcher = self.make_fetcher(budget=2, attempt_timeout=1.5, hedge=False)
+
+        start = time.monotonic()
+        self.assertIsNone(fetcher.fetch())
+        fetcher.close()
+        elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 2.5)
+        self.assertGreater(sum(fetcher.histogram.counts["timeout"]), 0)
+
+    def test_hedge_fires_after_p95_delay(self):
+        histogram = LatencyHistogram()
+        for _ in range(20):
+            histogram.record(0.4, "success")
+        self.assertEqual(histogram.percentile(0.95), 0.5)
+
+        self.server.configure(plan=[{"delay": 2}])
+        fetcher = self.make_fetcher(histogram=histogram)
+
+        start = time.monotonic()
+        self.assertEqual(fetcher.fetch(), 42)
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(self.server.hits, 2)
+        self.assertGreaterEqual(elapsed, 0.5)
+        self.assertLess(elapsed, 1.5)
+
+        # The slow request the hedge beat is recorded once close() returns
+        fetcher.close()
+        self.assertEqual(sum(histogram.counts["success"]), 22)
+
+    def test_hedge_fires_when_histogram_is_full_of_timeouts(self):
+        histogram = LatencyHistogram()
+        for _ in range(20):
+            histogram.record(20, "timeout")
+        self.assertEqual(histogram.percentile(0.95), 32)
+
+        self.server.configure(plan=[{"delay": 3}])
+        fetcher = self.make_fetcher(histogram=histogram, attempt_timeout=2)
+
+        start = time.monotonic()
+        self.assertEqual(fetcher.fetch(), 42)
+        elapsed = time.monotonic() - start
+        fetcher.close()
+
+        # The hedge is sent after attempt_timeout / 2, before the first times out
+        self.assertEqual(self.server.hits, 2)
+        self.assertGreaterEqual(elapsed, 1)
+        self.assertLess(elapsed, 2)
+
+    def test_timeouts_count_towards_hedge_delay(self):
+        histogram = LatencyHistogram()
+        for _ in range(10):
+            histogram.record(0.2, "success")
+            histogram.record(10, "timeout")
+
+        self.assertEqual(histogram.percentile(0.95), 16)
+
+
+class RetryQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.tz = pytz.timezone("Europe/Oslo")
+        self.now = self.tz.localize(datetime.datetime(2025, 3, 22, 12, 14))
+
+    def test_pending_drops_expired_and_keeps_valid_slots(self):
+        queue = RetryQueue(path="unused.json")
+        queue.add(self.tz.localize(datetime.datetime(2025, 3, 22, 11, 30)))
+        queue.add(self.tz.localize(datetime.datetime(2025, 3, 22, 12, 0)))
+
+        pending = queue.pending(self.now)
+
+        self.assertEqual([slot.strftime("%H:%M") for slot in pending], ["12:00"])
+        self.assertEqual(queue.slots, ["2025-03-22 12:00:00"])
+
+    def test_remove_only_filled_slots(self):
+        queue = RetryQueue(path="unused.json")
+        queue.add(self.tz.localize(datetime.datetime(2025, 3, 22, 11, 58)))
+        queue.add(self.tz.localize(datetime.datetime(2025, 3, 22, 12, 0)))
+
+        queue.remove(queue.pending(self.now)[0])
+
+        self.assertEqual(queue.slots, ["2025-03-22 12:00:00"])
+
+
+if __name__ == "__main__":
+    unittest.main()